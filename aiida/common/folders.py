@@ -8,9 +8,15 @@
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
 import os
+import re
+import errno
 import shutil
 import fnmatch
 import tempfile
+try:
+    from os import scandir
+except ImportError:
+    from scandir import scandir
 
 from aiida.common.utils import get_repository_folder
 
@@ -23,18 +29,71 @@ group_writable = True
 
 _valid_sections = ['node', 'workflow']
 
+# Memoization of the normalization of absolute paths done when constructing
+# Folder objects. The normalization is purely lexical (it does not depend on
+# the content of the disk), so entries never need to be invalidated; the cache
+# is simply emptied when it grows beyond _ABSPATH_CACHE_MAXSIZE entries.
+_ABSPATH_CACHE = {}
+_ABSPATH_CACHE_MAXSIZE = 4096
+
+
+def _cached_abspath(path):
+    """
+    Return ``os.path.abspath(path)``, caching the result for absolute paths.
+
+    Relative paths depend on the current working directory and are therefore
+    never cached. The type of the path is part of the key, since in python 2
+    equal ``str`` and ``unicode`` paths would otherwise share the same entry,
+    and the returned path must have the same type as the one passed.
+    """
+    key = (type(path), path)
+    try:
+        return _ABSPATH_CACHE[key]
+    except KeyError:
+        pass
+
+    abspath = os.path.abspath(path)
+    if os.path.isabs(path):
+        if len(_ABSPATH_CACHE) >= _ABSPATH_CACHE_MAXSIZE:
+            _ABSPATH_CACHE.clear()
+        _ABSPATH_CACHE[key] = abspath
+    return abspath
+
+
+def _makedirs(path, mode=0o777):
+    """
+    Create the folder at ``path``, including its missing parents, doing nothing
+    if it already exists.
+
+    This is ``os.makedirs(path, mode, exist_ok=True)``, that is not available
+    in python 2: the existence is not checked beforehand, so that
+    no additional stat is needed and no error is raised if another process
+    creates the folder at the same time.
+    """
+    try:
+        os.makedirs(path, mode)
+    except OSError as exc:
+        if exc.errno != errno.EEXIST or not os.path.isdir(path):
+            raise
+
+
+def _is_within(path, folder):
+    """
+    Return True if the normalized absolute ``path`` is ``folder`` itself or
+    lies inside it.
+
+    Contrary to ``os.path.commonprefix``, which works character by character,
+    this compares whole path components, so that ``/a/b2/c`` is not
+    considered to be within ``/a/b``.
+    """
+    return path == folder or path.startswith(folder.rstrip(os.sep) + os.sep)
+
 
 class Folder(object):
     """
     A class to manage generic folders, avoiding to get out of
     specific given folder borders.
 
-    .. todo::
-        fix this, os.path.commonprefix of /a/b/c and /a/b2/c will give
-        a/b, check if this is wanted or if we want to put trailing slashes.
-        (or if we want to use os.path.relpath and check for a string starting
-        with os.pardir?)
-
     .. todo::
         rethink whether the folder_limit option is still useful. If not, remove
         it alltogether (it was a nice feature, but unfortunately all the calls
@@ -42,15 +101,14 @@ class Folder(object):
     """
 
     def __init__(self, abspath, folder_limit=None):
-        abspath = os.path.abspath(abspath)
+        abspath = _cached_abspath(abspath)
         if folder_limit is None:
             folder_limit = abspath
         else:
-            folder_limit = os.path.abspath(folder_limit)
+            folder_limit = _cached_abspath(folder_limit)
 
             # check that it is a subfolder
-            if not os.path.commonprefix([abspath,
-                                         folder_limit]) == folder_limit:
+            if not _is_within(abspath, folder_limit):
                 raise ValueError(
                     "The absolute path for this folder is not within the "
                     "folder_limit. abspath={}, folder_limit={}.".format(
@@ -94,8 +152,8 @@ class Folder(object):
 
         :Returns: a Folder object pointing to the subfolder.
         """
-        dest_abs_dir = os.path.abspath(os.path.join(
-            self.abspath, unicode(subfolder)))
+        # The path is normalized only once, by the Folder constructor
+        dest_abs_dir = os.path.join(self.abspath, unicode(subfolder))
 
         if reset_limit:
             # Create a new Folder object, with a limit to itself (cannot go
@@ -113,6 +171,39 @@ class Folder(object):
 
         return new_folder
 
+    def iter_content(self, pattern='*', only_paths=True):
+        """
+        Iterate over the files (and subfolders) in the folder,
+        matching a given pattern.
+
+        Contrary to :py:meth:`get_content_list`, the entries are yielded
+        lazily while the directory is being read (``scandir`` returns an
+        iterator), so that callers that only need the first few matches
+        do not have to list the whole folder.
+
+        :param pattern: a pattern for the file/folder names, using Unix filename
+                pattern matching (see Python standard module fnmatch).
+                By default, pattern is '*', matching all files and folders.
+        :param only_paths: if False, yield pairs (name, is_file).
+                if True (default), yield only the names.
+        """
+        # The pattern is translated to a regular expression only once, instead
+        # of at every call of fnmatch.fnmatch. As fnmatch does, names are
+        # normalized with normcase, so that matching is case-insensitive on
+        # case-insensitive platforms.
+        match = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+        normcase = os.path.normcase
+
+        for entry in scandir(self.abspath):
+            if match(normcase(entry.name)):
+                if only_paths:
+                    yield entry.name
+                else:
+                    # scandir caches the file type returned by the directory
+                    # listing, so that no additional stat per entry is needed
+                    # to tell files and directories apart
+                    yield (entry.name, not entry.is_dir())
+
     def get_content_list(self, pattern='*', only_paths=True):
         """
         Return a list of files (and subfolders) in the folder,
@@ -132,14 +223,7 @@ class Folder(object):
             the second is True if the element is a file, False if it is a
             directory.
         """
-        file_list = [fname for fname in os.listdir(self.abspath)
-                     if fnmatch.fnmatch(fname, pattern)]
-
-        if only_paths:
-            return file_list
-        else:
-            return [(fname, not os.path.isdir(os.path.join(self.abspath, fname)))
-                    for fname in file_list]
+        return list(self.iter_content(pattern=pattern, only_paths=only_paths))
 
     def create_symlink(self, src, name):
         """
@@ -156,7 +240,7 @@ class Folder(object):
 
         # For symlinks, permissions should not be set
 
-    def insert_path(self, src, dest_name=None, overwrite=True):
+    def insert_path(self, src, dest_name=None, overwrite=True, mode='copy'):
         """
         Copy a file to the folder.
 
@@ -165,7 +249,14 @@ class Folder(object):
                 the destination filename will have this file name.
         :param overwrite: if ``False``, raises an error on existing destination;
                 otherwise, delete it first.
+        :param mode: how to insert src in the folder. If ``'copy'`` (default),
+                the file or folder is copied. If ``'symlink'``, a symbolic
+                link pointing to src is created instead.
         """
+        if mode not in ('copy', 'symlink'):
+            raise ValueError("mode must be either 'copy' or 'symlink', "
+                             "got {}".format(mode))
+
         if dest_name is None:
             filename = unicode(os.path.basename(src))
         else:
@@ -180,40 +271,32 @@ class Folder(object):
             raise ValueError("src must be an absolute path in insert_file")
 
         # In this way, the destination is always correct (i.e., if I copy to a
-        # folder, I point to the correct location inside it)
-        if os.path.isdir(dest_abs_path):
+        # folder, I point to the correct location inside it). A symlink to a
+        # folder is not followed, it is replaced (or overwrite fails)
+        if os.path.isdir(dest_abs_path) and not os.path.islink(dest_abs_path):
             dest_abs_path = os.path.join(dest_abs_path, os.path.basename(src))
 
-        if os.path.isfile(src):
-            if os.path.exists(dest_abs_path):
-                if overwrite:
-                    if os.path.isdir(dest_abs_path):
-                        shutil.rmtree(dest_abs_path)
-                    else:
-                        os.remove(dest_abs_path)
-                    # This automatically overwrites files
-                    shutil.copyfile(src, dest_abs_path)
-                else:
-                    raise IOError("destination already exists: {}".format(
-                        os.path.join(dest_abs_path)))
-            else:
-                shutil.copyfile(src, dest_abs_path)
-        elif os.path.isdir(src):
-            if os.path.exists(dest_abs_path):
-                if overwrite:
-                    if os.path.isdir(dest_abs_path):
-                        shutil.rmtree(dest_abs_path)
-                    else:
-                        os.remove(dest_abs_path)
-                    # This automatically overwrites files
-                    shutil.copytree(src, dest_abs_path)
+        if not os.path.isfile(src) and not os.path.isdir(src):
+            raise ValueError("insert_path can only insert files or paths, not symlinks or the like")
+
+        # lexists, so that also dangling symlinks are removed rather than
+        # written through
+        if os.path.lexists(dest_abs_path):
+            if overwrite:
+                if os.path.isdir(dest_abs_path) and not os.path.islink(dest_abs_path):
+                    shutil.rmtree(dest_abs_path)
                 else:
-                    raise IOError("destination already exists: {}".format(
-                        os.path.join(dest_abs_path)))
+                    os.remove(dest_abs_path)
             else:
-                shutil.copytree(src, dest_abs_path)
+                raise IOError("destination already exists: {}".format(
+                    os.path.join(dest_abs_path)))
+
+        if mode == 'symlink':
+            os.symlink(src, dest_abs_path)
+        elif os.path.isfile(src):
+            shutil.copyfile(src, dest_abs_path)
         else:
-            raise ValueError("insert_path can only insert files or paths, not symlinks or the like")
+            shutil.copytree(src, dest_abs_path)
 
         return dest_abs_path
 
@@ -276,7 +359,7 @@ class Folder(object):
             raise ValueError("relpath must be a relative path")
         dest_abs_path = os.path.join(self.abspath, relpath)
 
-        if not os.path.commonprefix([dest_abs_path, self.folder_limit]) == self.folder_limit:
+        if not _is_within(os.path.normpath(dest_abs_path), self.folder_limit):
             errstr = "You didn't specify a valid filename: {}".format(relpath)
             raise ValueError(errstr)
 
@@ -356,11 +439,11 @@ class Folder(object):
         It is always safe to call it, it will do nothing if the folder
         already exists.
         """
-        if not self.exists():
-            os.makedirs(self.abspath, mode=self.mode_dir)
+        _makedirs(self.abspath, mode=self.mode_dir)
 
 
-    def replace_with_folder(self, srcdir, move=False, overwrite=False):
+    def replace_with_folder(self, srcdir, move=False, overwrite=False,
+                            copytree_func=None):
         """
         This routine copies or moves the source folder 'srcdir' to the local
         folder pointed by this Folder object.
@@ -373,6 +456,11 @@ class Folder(object):
                 if False, a IOError is raised if the folder already exists.
                 Whatever the value of this flag, parent directories will be
                 created, if needed.
+        :param copytree_func: the function used to copy the folder when move
+                is False, called as ``copytree_func(srcdir, destdir)``, where
+                destdir does not exist yet. If None (default),
+                ``shutil.copytree`` is used. This allows to plug in faster
+                platform-specific tools (e.g. robocopy on Windows).
 
         :Raises:
             OSError or IOError: in case of problems accessing or writing
@@ -390,13 +478,15 @@ class Folder(object):
 
         # Create parent dir, if needed, with the right mode
         pardir = os.path.dirname(self.abspath)
-        if not os.path.exists(pardir):
-            os.makedirs(pardir, mode=self.mode_dir)
+        _makedirs(pardir, mode=self.mode_dir)
 
         if move:
+            # This is a simple rename if srcdir is on the same filesystem
             shutil.move(srcdir, self.abspath)
         else:
-            shutil.copytree(srcdir, self.abspath)
+            if copytree_func is None:
+                copytree_func = shutil.copytree
+            copytree_func(srcdir, self.abspath)
 
         # Set the mode also for the current dir, recursively
         for dirpath, dirnames, filenames in os.walk(self.abspath,
@@ -440,8 +530,7 @@ class SandboxFolder(Folder):
         # First check if the sandbox folder already exists
         if sandbox_in_repo:
             sandbox = get_repository_folder('sandbox')
-            if not os.path.exists(sandbox):
-                os.makedirs(sandbox)
+            _makedirs(sandbox)
             abspath = tempfile.mkdtemp(dir=sandbox)
         else:
             abspath = tempfile.mkdtemp()
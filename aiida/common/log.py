@@ -8,7 +8,6 @@
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
 import logging
-from copy import deepcopy
 from logging import config
 from aiida.common import setup
 from aiida.backends.utils import is_dbenv_loaded
@@ -39,8 +38,18 @@ aiidalogger = logging.getLogger('aiida')
 # A logging filter that can be used to disable logging
 class NotInTestingFilter(logging.Filter):
 
+    _settings = None
+
     def filter(self, record):
-        from aiida import settings
+        # The settings cannot be imported when the filter is created, since this
+        # happens while the aiida package itself is imported, before a profile
+        # is loaded. They are imported with the first record and then kept. The
+        # flag itself is not stored, since TESTING_MODE can be switched on at
+        # runtime
+        settings = self._settings
+        if settings is None:
+            from aiida import settings
+            self._settings = settings
         return not settings.TESTING_MODE
 
 
@@ -73,7 +82,9 @@ class DBLogHandler(logging.Handler):
 
 
 # The default logging dictionary for AiiDA that can be used in conjunction
-# with the config.dictConfig method of python's logging module
+# with the config.dictConfig method of python's logging module. The levels of
+# the handlers and loggers listed in _LOGLEVEL_PROPERTIES are set below, by
+# reload_logging_config
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -100,40 +111,63 @@ LOGGING = {
             'filters': ['testing']
         },
         'dblogger': {
-            # setup.get_property takes the property from the config json file
-            # The key used in the json, and the default value, are
-            # specified in the _property_table inside aiida.common.setup
-            # NOTE: To modify properties, use the 'verdi devel setproperty'
-            #   command and similar ones (getproperty, describeproperties, ...)
-            'level': setup.get_property('logging.db_loglevel'),
             'class': 'aiida.common.log.DBLogHandler',
         },
     },
     'loggers': {
         'aiida': {
             'handlers': ['console', 'dblogger'],
-            'level': setup.get_property('logging.aiida_loglevel'),
             'propagate': False,
         },
         'paramiko': {
             'handlers': ['console'],
-            'level': setup.get_property('logging.paramiko_loglevel'),
             'propagate': False,
         },
         'alembic': {
             'handlers': ['console'],
-            'level': setup.get_property('logging.alembic_loglevel'),
             'propagate': False,
         },
         'sqlalchemy': {
             'handlers': ['console'],
-            'level': setup.get_property('logging.sqlalchemy_loglevel'),
             'propagate': False,
             'qualname': 'sqlalchemy.engine',
         },
     },
 }
 
+# The configuration properties that define the levels of the handlers and
+# loggers in LOGGING, indexed by the section and name of the entry they apply to.
+# setup.get_property takes the property from the config json file
+# The key used in the json, and the default value, are
+# specified in the _property_table inside aiida.common.setup
+# NOTE: To modify properties, use the 'verdi devel setproperty'
+#   command and similar ones (getproperty, describeproperties, ...)
+_LOGLEVEL_PROPERTIES = {
+    ('handlers', 'dblogger'): 'logging.db_loglevel',
+    ('loggers', 'aiida'): 'logging.aiida_loglevel',
+    ('loggers', 'paramiko'): 'logging.paramiko_loglevel',
+    ('loggers', 'alembic'): 'logging.alembic_loglevel',
+    ('loggers', 'sqlalchemy'): 'logging.sqlalchemy_loglevel',
+}
+
+
+def reload_logging_config():
+    """
+    Read again the log levels from the configuration file and update the LOGGING
+    dictionary accordingly.
+
+    This is called once when this module is imported, so it has to be called
+    again for changes of the properties (e.g. through
+    ``verdi devel setproperty``) to be taken into account by the following calls
+    to :py:func:`configure_logging`.
+    """
+    for (section, name), property_name in _LOGLEVEL_PROPERTIES.items():
+        LOGGING[section][name]['level'] = setup.get_property(property_name)
+
+
+reload_logging_config()
+
+
 def configure_logging(daemon=False, daemon_log_file=None):
     """
     Setup the logging by retrieving the LOGGING dictionary from aiida and passing it to
@@ -146,7 +180,9 @@ def configure_logging(daemon=False, daemon_log_file=None):
         of the default 'console' StreamHandler
     :param daemon_log_file: absolute filepath of the log file for the RotatingFileHandler
     """
-    config = deepcopy(LOGGING)
+    # Only the containers that are modified are copied: dictConfig does not
+    # alter the dictionary it is passed, so the rest can be shared with LOGGING
+    config = dict(LOGGING)
     daemon_handler_name = 'daemon_log_file'
 
     # Add the daemon file handler to all loggers if daemon=True
@@ -155,7 +191,7 @@ def configure_logging(daemon=False, daemon_log_file=None):
         if daemon_log_file is None:
             raise ValueError('daemon_log_file has to be defined when configuring for the daemon')
 
-        config.setdefault('handlers', {})
+        config['handlers'] = dict(config.get('handlers', {}))
         config['handlers'][daemon_handler_name] = {
             'level': 'DEBUG',
             'formatter': 'halfverbose',
@@ -165,26 +201,40 @@ def configure_logging(daemon=False, daemon_log_file=None):
             'maxBytes': 100000,
         }
 
-        for name, logger in config.get('loggers', {}).iteritems():
-            logger.setdefault('handlers', []).append(daemon_handler_name)
+        config['loggers'] = {
+            name: dict(logger, handlers=list(logger.get('handlers', [])) + [daemon_handler_name])
+            for name, logger in config.get('loggers', {}).items()
+        }
 
     logging.config.dictConfig(config)
 
 
+# Cache of the object names returned by get_dblogger_extra, indexed by the
+# class of the object and its plugin type string
+_OBJNAME_CACHE = {}
+
+
 def get_dblogger_extra(obj):
     """
     Given an object (Node, Calculation, ...) return a dictionary to be passed
     as extra to the aiidalogger in order to store the exception also in the DB.
     If no such extra is passed, the exception is only logged on file.
     """
-    from aiida.orm import Node
-
-    if isinstance(obj, Node):
-        if obj._plugin_type_string:
-            objname = "node." + obj._plugin_type_string
+    key = (obj.__class__, getattr(obj, '_plugin_type_string', None))
+    try:
+        objname = _OBJNAME_CACHE[key]
+    except KeyError:
+        from aiida.orm import Node
+
+        if isinstance(obj, Node):
+            if obj._plugin_type_string:
+                objname = "node." + obj._plugin_type_string
+            else:
+                objname = "node"
         else:
-            objname = "node"
-    else:
-        objname = obj.__class__.__module__ + "." + obj.__class__.__name__
+            objname = obj.__class__.__module__ + "." + obj.__class__.__name__
+        _OBJNAME_CACHE[key] = objname
+
+    # The pk is not cached, as it is only set once the node is stored
     objpk = obj.pk
-    return {'objpk': objpk, 'objname': objname}
\ No newline at end of file
+    return {'objpk': objpk, 'objname': objname}
@@ -46,3 +46,171 @@ class FoldersTest(unittest.TestCase):
         # Should not raise any exception
         self.assertEquals(fd.get_abs_path('test_file.txt'),
                           '/tmp/test_file.txt')
+
+    def test_abspath_type(self):
+        """
+        Check that the type of the absolute path (str or unicode) is the one
+        of the path passed, also when the same path was already used with
+        a different type.
+        """
+        from aiida.common.folders import Folder
+        import tempfile
+
+        tmpdir = tempfile.mkdtemp()
+        self.assertIsInstance(Folder(str(tmpdir)).abspath, str)
+        self.assertIsInstance(Folder(u'{}'.format(tmpdir)).abspath,
+                              type(u''))
+
+    def test_folder_limit(self):
+        """
+        Check that a folder sharing only a string prefix with the
+        folder_limit is not considered to be within the limit.
+        """
+        from aiida.common.folders import Folder
+
+        fd = Folder('/tmp/a/b/c', folder_limit='/tmp/a/b')
+        self.assertEquals(fd.abspath, '/tmp/a/b/c')
+
+        with self.assertRaises(ValueError):
+            Folder('/tmp/a/b2/c', folder_limit='/tmp/a/b')
+
+        with self.assertRaises(ValueError):
+            fd.get_subfolder('../../b2')
+
+    def test_get_abs_path_outside_limit(self):
+        from aiida.common.folders import Folder
+
+        fd = Folder('/tmp/a/b')
+        self.assertEquals(fd.get_abs_path('c/../d.txt'), '/tmp/a/b/c/../d.txt')
+
+        with self.assertRaises(ValueError):
+            fd.get_abs_path('../b2/test_file.txt')
+
+    def test_iter_content(self):
+        from aiida.common.folders import Folder
+        import os, tempfile
+
+        tmpdir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(tmpdir, 'subfolder'))
+        with open(os.path.join(tmpdir, 'file.txt'), 'w') as f:
+            f.write("test")
+        with open(os.path.join(tmpdir, '.hidden'), 'w') as f:
+            f.write("test")
+
+        fd = Folder(tmpdir)
+        self.assertEquals(sorted(fd.iter_content(pattern='[!.]*')),
+                          ['file.txt', 'subfolder'])
+        self.assertEquals(sorted(fd.iter_content(only_paths=False)),
+                          [('.hidden', True), ('file.txt', True),
+                           ('subfolder', False)])
+        self.assertEquals(sorted(fd.iter_content(only_paths=False)),
+                          sorted(fd.get_content_list(only_paths=False)))
+
+    def test_insert_path_mode(self):
+        """
+        Check the symlink and copy modes of insert_path, and that storing the
+        inserted files (which sets their permissions) leaves the source
+        untouched.
+        """
+        from aiida.common.folders import Folder
+        import os, stat, tempfile
+
+        tmpsource = tempfile.mkdtemp()
+        tmpdest = tempfile.mkdtemp()
+        src = os.path.join(tmpsource, 'source.sh')
+        with open(src, 'w') as f:
+            f.write("test")
+        os.chmod(src, 0o755)
+
+        fd = Folder(os.path.join(tmpdest, 'sandbox'))
+        fd.create()
+        dest = fd.insert_path(src, 'symlink.sh', mode='symlink')
+        self.assertTrue(os.path.islink(dest))
+        dest = fd.insert_path(src, 'copy.sh')
+        self.assertFalse(os.path.samefile(src, dest))
+        with open(dest) as f:
+            self.assertEquals(f.read(), "test")
+
+        with self.assertRaises(ValueError):
+            fd.insert_path(src, 'hardlink.sh', mode='link')
+
+        repo = Folder(os.path.join(tmpdest, 'repository'))
+        repo.replace_with_folder(fd.abspath, move=True)
+        self.assertEquals(
+            stat.S_IMODE(os.stat(os.path.join(repo.abspath, 'copy.sh')).st_mode),
+            repo.mode_file)
+        self.assertEquals(stat.S_IMODE(os.stat(src).st_mode), 0o755)
+
+    def test_insert_path_overwrite_symlink(self):
+        """
+        Check that overwriting a symlink replaces the link itself, also when
+        its target does not exist anymore, instead of writing through it.
+        """
+        from aiida.common.folders import Folder
+        import os, tempfile
+
+        tmpsource = tempfile.mkdtemp()
+        tmpdest = tempfile.mkdtemp()
+        src = os.path.join(tmpsource, 'source.txt')
+        gone = os.path.join(tmpsource, 'gone.txt')
+        subfolder = os.path.join(tmpsource, 'subfolder')
+        os.mkdir(subfolder)
+        for fname in [src, gone]:
+            with open(fname, 'w') as f:
+                f.write("test")
+
+        fd = Folder(tmpdest)
+        fd.insert_path(gone, 'link', mode='symlink')
+        os.remove(gone)
+        dest = fd.insert_path(src, 'link', mode='symlink', overwrite=True)
+        self.assertEquals(os.readlink(dest), src)
+
+        os.symlink(gone, fd.get_abs_path('dangling'))
+        dest = fd.insert_path(src, 'dangling', overwrite=True)
+        self.assertFalse(os.path.islink(dest))
+        self.assertFalse(os.path.exists(gone))
+
+        fd.insert_path(subfolder, 'dirlink', mode='symlink')
+        dest = fd.insert_path(src, 'dirlink', overwrite=True)
+        self.assertEquals(dest, fd.get_abs_path('dirlink'))
+        self.assertTrue(os.path.isfile(dest))
+        self.assertEquals(os.listdir(subfolder), [])
+
+    def test_replace_with_folder_copytree_func(self):
+        from aiida.common.folders import Folder
+        import os, shutil, tempfile
+
+        tmpsource = tempfile.mkdtemp()
+        tmpdest = tempfile.mkdtemp()
+        with open(os.path.join(tmpsource, 'file.txt'), 'w') as f:
+            f.write("test")
+
+        calls = []
+
+        def copytree(src, dst):
+            calls.append((src, dst))
+            shutil.copytree(src, dst)
+
+        fd = Folder(os.path.join(tmpdest, 'destination'))
+        fd.replace_with_folder(tmpsource, copytree_func=copytree)
+        self.assertEquals(calls, [(tmpsource, fd.abspath)])
+        self.assertEquals(fd.get_content_list(), ['file.txt'])
+
+    def test_create_existing(self):
+        """
+        Creating a folder that already exists should do nothing, while
+        creating a folder where a file exists should raise.
+        """
+        from aiida.common.folders import Folder
+        import os, tempfile
+
+        tmpdir = tempfile.mkdtemp()
+        fd = Folder(os.path.join(tmpdir, 'a', 'b'))
+        fd.create()
+        fd.create()
+        self.assertTrue(fd.exists())
+
+        with open(os.path.join(tmpdir, 'file.txt'), 'w') as f:
+            f.write("test")
+        with self.assertRaises(OSError):
+            Folder(os.path.join(tmpdir, 'file.txt')).create()
@@ -24,4 +24,46 @@ class TestLogger(unittest.TestCase):
         crash when they reach the handler and no database is set yet
         """
         logger = logging.getLogger('aiida')
-        logger.critical('Test critical log')
\ No newline at end of file
+        logger.critical('Test critical log')
+
+    def test_reload_logging_config(self):
+        """
+        Reloading the logging configuration should restore the log levels
+        defined by the configuration properties
+        """
+        from aiida.common import setup
+        from aiida.common.log import LOGGING, reload_logging_config
+
+        level = LOGGING['loggers']['aiida']['level']
+        LOGGING['loggers']['aiida']['level'] = logging.CRITICAL + 1
+        try:
+            reload_logging_config()
+            self.assertEquals(LOGGING['loggers']['aiida']['level'],
+                              setup.get_property('logging.aiida_loglevel'))
+        finally:
+            LOGGING['loggers']['aiida']['level'] = level
+
+    def test_configure_logging_without_settings(self):
+        """
+        Configuring the logging happens when aiida is imported, before
+        a profile is loaded, so it must not import aiida.settings
+        """
+        import sys
+        import aiida
+        from aiida.common.log import configure_logging
+
+        settings_module = sys.modules.get('aiida.settings')
+        settings_attr = aiida.__dict__.pop('settings', None)
+        # A None entry in sys.modules makes any import of the module fail
+        sys.modules['aiida.settings'] = None
+        try:
+            configure_logging()
+        finally:
+            if settings_module is None:
+                del sys.modules['aiida.settings']
+            else:
+                sys.modules['aiida.settings'] = settings_module
+            if settings_attr is not None:
+                aiida.settings = settings_attr
+
+        logging.getLogger('aiida').critical('Test critical log')
@@ -2120,9 +2120,14 @@ class ZipFolder(object):
         subfolder = ZipFolder(self, subfolder=subfolder)
         return subfolder
 
-    def insert_path(self, src, dest_name=None, overwrite=True):
+    def insert_path(self, src, dest_name=None, overwrite=True, mode='copy'):
         import os
 
+        # Symlinks cannot be stored in the zip file: only copying is supported
+        if mode != 'copy':
+            raise ValueError("ZipFolder can only copy files, mode must be "
+                             "'copy', got {}".format(mode))
+
         if dest_name is None:
             base_filename = unicode(os.path.basename(src))
         else:
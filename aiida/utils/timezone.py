@@ -11,6 +11,7 @@
 import pytz
 
 from datetime import datetime
+from tzlocal import get_localzone
 
 from aiida import settings
 
@@ -22,7 +23,7 @@ from aiida import settings
 utc = pytz.utc
 
 def get_current_timezone():
-    from tzlocal import get_localzone
+    # tzlocal caches the local timezone after the first call
     return get_localzone()
 
 
@@ -52,8 +53,10 @@ def make_aware(value, timezone=None, is_dst=None):
     """
     if timezone is None:
         timezone = get_current_timezone()
-    if hasattr(timezone, 'localize'):
-        return timezone.localize(value, is_dst=is_dst)
+    # This method is available for pytz time zones.
+    localize = getattr(timezone, 'localize', None)
+    if localize is not None:
+        return localize(value, is_dst=is_dst)
     else:
         if is_aware(value):
             raise ValueError(
@@ -73,9 +76,10 @@ def localtime(value, timezone=None):
     # If `value` is naive, astimezone() will raise a ValueError,
     # so we don't need to perform a redundant check.
     value = value.astimezone(timezone)
-    if hasattr(timezone, 'normalize'):
-        # This method is available for pytz time zones.
-        value = timezone.normalize(value)
+    # This method is available for pytz time zones.
+    normalize = getattr(timezone, 'normalize', None)
+    if normalize is not None:
+        value = normalize(value)
     return value
 
 
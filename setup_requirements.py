@@ -23,6 +23,7 @@ install_requires = [
     'six==1.11.0',
     'future==0.16.0',
     'pathlib2==2.3.0',
+    'scandir==1.6',
     # We need for the time being to stay with an old version
     # of celery, including the versions of the AMQP libraries below,
     # because the support for a SQLA broker has been dropped in later
@@ -71,7 +72,7 @@ install_requires = [
 
 extras_require = {
     # Requirements for Python 2 only
-    ':python_version < "3"': ['chainmap', 'pathlib2', 'singledispatch >= 3.4.0.3'],
+    ':python_version < "3"': ['chainmap', 'pathlib2', 'scandir', 'singledispatch >= 3.4.0.3'],
     # Requirements for ssh transport with authentification through Kerberos
     # token
     # N. B.: you need to install first libffi and MIT kerberos GSSAPI including header files.